@@ -1,275 +1,387 @@
-import pandas as pd
-import random
-import math
-import re
-from collections import defaultdict
-import sys
-import traceback
-
-# File paths
-winnings_file = "cumulative_winnings.csv"  # File to store cumulative winnings
-sheet_url = "https://docs.google.com/spreadsheets/d/xxxx"  # Replace with actual Google Sheet URL
-
-# Category item limits
-CATEGORY_LIMITS = {
-    "Insignias [Red]": 28,
-    "Insignias [Yellow]": 28,
-    "Selection cards": {"Hero Selection card": 1, "Relic Selection card": 1},
-    "Stones": {"T2 Stone": 4, "T1 Stone": 3, "Recast Stone": 4}
-}
-
-def fetch_google_sheet_data(sheet_url):
-    """Fetch data from the Google Sheet."""
-    try:
-        sheet_id = sheet_url.split("/")[5]
-        export_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
-        return pd.read_csv(export_url)
-    except Exception as e:
-        print("Error fetching Google Sheet data:", e)
-        traceback.print_exc()
-        sys.exit(1)  # Exit if data fetching fails
-
-def load_previous_winnings():
-    """Load cumulative winnings per category from the CSV file."""
-    try:
-        df = pd.read_csv(winnings_file)
-        winnings_tracker = defaultdict(lambda: defaultdict(int))
-        for _, row in df.iterrows():
-            category = row['category']
-            member = row['member']
-            total_winnings = row['total_winnings']
-            winnings_tracker[category][member] = total_winnings
-        return winnings_tracker
-    except FileNotFoundError:
-        print(f"Warning: {winnings_file} not found. Starting with empty winnings.")
-        return defaultdict(lambda: defaultdict(int))
-    except Exception as e:
-        print("Error loading previous winnings:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-def parse_participants(data):
-    """Parse participants and their latest choices from the fetched data."""
-    try:
-        categories = ['Insignias [Red]', 'Insignias [Yellow]', 'Selection cards', 'Stones']
-
-        # Convert timestamp to datetime for sorting
-        data['Tidsstempel'] = pd.to_datetime(data['Tidsstempel'], format="%d/%m/%Y %H.%M.%S")
-        # Sort data by timestamp in descending order and keep only the latest entry per participant
-        latest_entries = data.sort_values('Tidsstempel', ascending=False).drop_duplicates('username')
-
-        participants = defaultdict(lambda: defaultdict(list))
-        for _, row in latest_entries.iterrows():
-            member = row['username']
-            
-            # Parse Insignias as integers (1 or 2 items)
-            for category in ['Insignias [Red]', 'Insignias [Yellow]']:
-                if pd.notna(row[category]):
-                    participants[member][category] = int(float(row[category]))  # Convert to integer
-            
-            # Parse Selection cards and Stones as lists of specific items
-            for category in ['Selection cards', 'Stones']:
-                items = str(row[category]).split(",") if pd.notna(row[category]) else []
-                items = [item.strip() for item in items]  # Clean up whitespace
-                participants[member][category].extend(items)
-
-        return participants
-    except Exception as e:
-        print("Error parsing participants data:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-def distribute_items(participants_choices, winnings_tracker):
-    """Distribute items fairly among participants using improved weighted random selection."""
-    allocation = []  # Store allocation results
-    participant_item_count = defaultdict(int)  # Track how many items each participant has won
-
-    try:
-        for category, limit in CATEGORY_LIMITS.items():
-            if isinstance(limit, int):  # Fixed-limit categories (e.g., Insignias)
-                category_participants = [
-                    [p, participants_choices[p][category]]  # Use the requested number of items directly (1 or 2)
-                    for p in participants_choices if category in participants_choices[p]
-                ]
-
-                items = [f"{category} #{i+1}" for i in range(limit)]
-                items.sort(key=numeric_sort_key)  # Ensure items are sorted numerically
-
-                if not category_participants:
-                    # If no participants, mark all items as "First Come, First Serve"
-                    allocation.extend([(item, "First Come, First Serve") for item in items])
-                    continue
-
-                # First pass: Distribute one item per participant who requested at least one
-                first_pass_participants = [p for p, max_items in category_participants if max_items >= 1]
-                for participant in first_pass_participants:
-                    if items:
-                        item = items.pop(0)
-                        allocation.append((item, participant))
-                        winnings_tracker[category][participant] += 1
-                        participant_item_count[participant] += 1
-
-                # Compute average winnings for dynamic boosting
-                average_winnings = (
-                    sum(winnings_tracker[category].values()) / len(winnings_tracker[category])
-                    if len(winnings_tracker[category]) > 0 else 0
-                )
-
-                # Second pass: Distribute remaining items based on improved weights
-                second_pass_participants = [
-                    p for p, max_items in category_participants if max_items == 2 and participant_item_count[p] < 2
-                ]
-                while items:
-                    if not second_pass_participants:
-                        break
-
-                    # Calculate improved weights (logarithmic scaling + dynamic boost)
-                    weights = [
-                        (1 / (1 + math.log(1 + winnings_tracker[category].get(p, 0)))) *
-                        (1.5 if winnings_tracker[category].get(p, 0) < average_winnings else 1)
-                        for p in second_pass_participants
-                    ]
-                    winner = random.choices(second_pass_participants, weights=weights, k=1)[0]
-
-                    # Allocate item to the winner
-                    item = items.pop(0)
-                    allocation.append((item, winner))
-                    winnings_tracker[category][winner] += 1
-                    participant_item_count[winner] += 1
-
-                    # Remove winner from second pass if they now have two items
-                    if participant_item_count[winner] == 2:
-                        second_pass_participants.remove(winner)
-
-                # If there are still unallocated items, mark them as "First Come, First Serve"
-                if items:
-                    allocation.extend([(item, "First Come, First Serve") for item in items])
-
-            elif isinstance(limit, dict):  # Subcategories (e.g., Stones, Selection cards)
-                for subcategory, sub_limit in limit.items():
-                    subcategory_participants = [
-                        [p, min(2, len([item for item in participants_choices[p][category] if item == subcategory]))]
-                        for p in participants_choices if category in participants_choices[p]
-                    ]
-
-                    items = [f"{subcategory} #{i+1}" for i in range(sub_limit)]
-                    items.sort(key=numeric_sort_key)  # Ensure items are sorted numerically
-
-                    if not subcategory_participants:
-                        # If no participants, mark all items as "First Come, First Serve"
-                        allocation.extend([(item, "First Come, First Serve") for item in items])
-                        continue
-
-                    # Compute average winnings for dynamic boosting
-                    average_winnings = (
-                        sum(winnings_tracker[subcategory].values()) / len(winnings_tracker[subcategory])
-                        if len(winnings_tracker[subcategory]) > 0 else 0
-                    )
-
-                    while items:
-                        # Filter out participants who reached their max items
-                        active_participants = [p for p in subcategory_participants if p[1] > 0]
-                        if not active_participants:
-                            break
-
-                        # Calculate improved weights (logarithmic scaling + dynamic boost)
-                        weights = [
-                            (1 / (1 + math.log(1 + winnings_tracker[subcategory].get(p[0], 0)))) *
-                            (1.5 if winnings_tracker[subcategory].get(p[0], 0) < average_winnings else 1)
-                            for p in active_participants
-                        ]
-                        winner_index = random.choices(range(len(active_participants)), weights=weights, k=1)[0]
-                        winner = active_participants[winner_index][0]
-
-                        # Allocate item to the winner
-                        item = items.pop(0)
-                        allocation.append((item, winner))
-                        winnings_tracker[subcategory][winner] += 1
-
-                        # Update max items for the winner
-                        active_participants[winner_index][1] -= 1
-
-                    # If there are still unallocated items, mark them as "First Come, First Serve"
-                    if items:
-                        allocation.extend([(item, "First Come, First Serve") for item in items])
-
-        return allocation
-    except Exception as e:
-        print("Error during item distribution:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-
-def update_winnings_file(winnings_tracker):
-    """Update the cumulative winnings file."""
-    try:
-        records = []
-        for category, members in winnings_tracker.items():
-            for member, total_winnings in members.items():
-                records.append({'category': category, 'member': member, 'total_winnings': total_winnings})
-        
-        df = pd.DataFrame(records)
-        df.to_csv(winnings_file, index=False)
-    except Exception as e:
-        print("Error updating winnings file:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-
-
-def numeric_sort_key(item):
-    """Extract numeric part of the item for proper numeric sorting."""
-    match = re.search(r"#(\d+)", item)
-    return int(match.group(1)) if match else float('inf')
-
-
-def write_output(allocation):
-    """Write the allocation result to a CSV file in the desired format."""
-    try:
-        formatted_allocation = []
-
-        for item, winner in allocation:
-            if "Red Insignia" in item:
-                formatted_category = "Red Insignia"
-            elif "Yellow Insignia" in item:
-                formatted_category = "Yellow Insignia"
-            elif "Selection card" in item:
-                formatted_category = "Selection card"
-            else:
-                formatted_category = "Stone"
-
-            formatted_allocation.append((item, winner))
-
-        # Write to CSV
-        df = pd.DataFrame(formatted_allocation, columns=['Item', 'Winner'])
-        df.to_csv("weekly_allocation.csv", index=False)
-        print("\nAllocation results written to 'weekly_allocation.csv'")
-    except Exception as e:
-        print("Error writing output file:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-def main():
-    try:
-        # Load cumulative winnings from previous weeks
-        winnings_tracker = load_previous_winnings()
-        
-        # Fetch and parse participants data from Google Sheet
-        data = fetch_google_sheet_data(sheet_url)
-        participants = parse_participants(data)
-        
-        # Distribute items fairly and get the allocation result
-        allocation = distribute_items(participants, winnings_tracker)
-        
-        # Update the cumulative winnings file
-        update_winnings_file(winnings_tracker)
-        
-        # Write the allocation result to a CSV file
-        write_output(allocation)
-    except Exception as e:
-        print("Error in main function:", e)
-        traceback.print_exc()
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather
+import pyarrow.parquet as pq
+import csv
+import hashlib
+import os
+import time
+from collections import defaultdict, Counter
+import sys
+import traceback
+
+import requests
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the selection kernel runs interpreted
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# File paths
+winnings_log_dir = "winnings_log"  # Append-only Parquet log of per-run winning deltas
+legacy_winnings_feather = "cumulative_winnings.feather"  # Pre-log storage, migrated on first load
+legacy_winnings_csv = "cumulative_winnings.csv"  # Pre-Feather storage, migrated on first load
+compaction_threshold = 20  # Collapse the log into one part once it has this many files
+sheet_url = "https://docs.google.com/spreadsheets/d/xxxx"  # Replace with actual Google Sheet URL
+cache_dir = os.path.expanduser("~/.cache/hcauction")  # Cache for downloaded sheet exports
+cache_ttl = 15  # Seconds a cached sheet export stays fresh
+
+# Single module-level Generator: faster draws than the legacy global
+# Mersenne state and seedable without np.random.seed side effects
+rng = np.random.default_rng()
+
+# Category item limits
+CATEGORY_LIMITS = {
+    "Insignias [Red]": 28,
+    "Insignias [Yellow]": 28,
+    "Selection cards": {"Hero Selection card": 1, "Relic Selection card": 1},
+    "Stones": {"T2 Stone": 4, "T1 Stone": 3, "Recast Stone": 4}
+}
+
+def _read_sheet_csv(path):
+    """Parse a sheet CSV export with the pyarrow engine and explicit dtypes.
+
+    Spelling out the schema skips pandas' type inference and parses the
+    form timestamps during the read, so no separate to_datetime pass is
+    needed downstream.
+    """
+    return pd.read_csv(
+        path,
+        engine='pyarrow',
+        dtype={
+            'username': 'string',
+            'Insignias [Red]': 'float32',
+            'Insignias [Yellow]': 'float32',
+            'Selection cards': 'string',
+            'Stones': 'string',
+        },
+        parse_dates=['Tidsstempel'],
+        date_format="%d/%m/%Y %H.%M.%S",
+    )
+
+
+def fetch_google_sheet_data(sheet_url, ignore_cache=False):
+    """Fetch data from the Google Sheet, using a short-lived on-disk cache.
+
+    Re-runs within the TTL read the cached export instead of hitting
+    Google's rate-limited export endpoint again. Pass ignore_cache=True
+    to force a fresh download.
+    """
+    try:
+        sheet_id = sheet_url.split("/")[5]
+        export_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
+
+        cached_path = os.path.join(cache_dir, hashlib.sha1(sheet_id.encode()).hexdigest() + ".csv")
+        if not ignore_cache and os.path.exists(cached_path):
+            if time.time() - os.path.getmtime(cached_path) < cache_ttl:
+                return _read_sheet_csv(cached_path)
+
+        response = requests.get(export_url, stream=True, timeout=30)
+        response.raise_for_status()
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cached_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                f.write(chunk)
+
+        return _read_sheet_csv(cached_path)
+    except Exception as e:
+        print("Error fetching Google Sheet data:", e)
+        traceback.print_exc()
+        sys.exit(1)  # Exit if data fetching fails
+
+def _migrate_legacy_winnings():
+    """One-time migration of old single-file storage into the winnings log."""
+    if os.path.exists(legacy_winnings_feather):
+        table = pyarrow.feather.read_table(legacy_winnings_feather)
+        _append_log_part(table.column('category').to_pylist(),
+                         table.column('member').to_pylist(),
+                         [int(w) for w in table.column('total_winnings').to_pylist()])
+        os.remove(legacy_winnings_feather)
+    if os.path.exists(legacy_winnings_csv):
+        with open(legacy_winnings_csv, newline='') as f:
+            rows = list(csv.DictReader(f))
+        if rows:
+            _append_log_part([row['category'] for row in rows],
+                             [row['member'] for row in rows],
+                             [int(row['total_winnings']) for row in rows])
+        os.remove(legacy_winnings_csv)
+
+
+def _append_log_part(categories, members, deltas):
+    """Write one batch of delta rows as a new part file in the winnings log."""
+    os.makedirs(winnings_log_dir, exist_ok=True)
+    part_path = os.path.join(winnings_log_dir, f"part-{time.time_ns()}.parquet")
+    table = pa.table({
+        'timestamp': pa.array([time.time()] * len(deltas), pa.float64()),
+        'category': pa.array(categories, pa.string()),
+        'member': pa.array(members, pa.string()),
+        'delta': pa.array(deltas, pa.int64()),
+    })
+    pq.write_table(table, part_path)
+
+
+def _read_log():
+    """Read the whole winnings log as one pyarrow Table."""
+    return pq.read_table(winnings_log_dir)
+
+
+def load_previous_winnings():
+    """Aggregate cumulative winnings per category from the winnings log."""
+    try:
+        _migrate_legacy_winnings()
+        winnings_tracker = defaultdict(int)  # Flat (category, member) keys: one hash probe per access
+        if not os.path.isdir(winnings_log_dir) or not os.listdir(winnings_log_dir):
+            print(f"Warning: {winnings_log_dir} not found. Starting with empty winnings.")
+            return winnings_tracker
+        table = _read_log()
+        for category, member, delta in zip(table.column('category').to_pylist(),
+                                           table.column('member').to_pylist(),
+                                           table.column('delta').to_pylist()):
+            winnings_tracker[(category, member)] += int(delta)
+        return winnings_tracker
+    except Exception as e:
+        print("Error loading previous winnings:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+def parse_participants(data):
+    """Parse participants and their latest choices from the fetched data."""
+    try:
+        # Keep only the latest entry per participant; idxmax on the timestamp
+        # (already parsed by the reader) avoids sorting the whole frame
+        latest_entries = data.loc[data.groupby('username')['Tidsstempel'].idxmax()]
+        latest_entries = latest_entries.set_index('username')
+
+        # Parse Insignias as integers (1 or 2 items), column-wise
+        for category in ['Insignias [Red]', 'Insignias [Yellow]']:
+            latest_entries[category] = latest_entries[category].fillna(0).astype(int)
+
+        # Parse Selection cards and Stones as lists of specific items, column-wise,
+        # plus a Counter per participant so per-subcategory counts are O(1) lookups
+        for category in ['Selection cards', 'Stones']:
+            latest_entries[category] = (
+                latest_entries[category].fillna('').astype(str).str.split(',')
+                .apply(lambda items: [item.strip() for item in items if item.strip()])
+            )
+            latest_entries[category + '_count'] = latest_entries[category].apply(Counter)
+
+        columns = ['Insignias [Red]', 'Insignias [Yellow]', 'Selection cards', 'Stones',
+                   'Selection cards_count', 'Stones_count']
+        return latest_entries[columns].to_dict('index')
+    except Exception as e:
+        print("Error parsing participants data:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+@njit(cache=True)
+def _select_winners(wins, caps, average_winnings, n_items, rng):
+    """Draw up to n_items weighted winners; the numeric hot path of the raffle.
+
+    Operates only on contiguous float64/int64 arrays so numba can compile
+    it. Weights use the same logarithmic scaling + dynamic boost as before;
+    each draw is a cumulative sum plus a searchsorted, and only the
+    winner's weight is recomputed. wins/caps are updated in place.
+    Returns the winner indices (fewer than n_items if all caps run out).
+    """
+    n = wins.shape[0]
+    weights = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        if caps[i] > 0:
+            weights[i] = (1.0 / (1.0 + np.log(1.0 + wins[i]))) * \
+                         (1.5 if wins[i] < average_winnings else 1.0)
+        else:
+            weights[i] = 0.0
+
+    winners = np.empty(n_items, dtype=np.int64)
+    cumulative = np.empty(n, dtype=np.float64)
+    count = 0
+    for _ in range(n_items):
+        total = 0.0
+        for i in range(n):
+            total += weights[i]
+            cumulative[i] = total
+        if total <= 0.0:
+            break
+
+        index = np.searchsorted(cumulative, rng.random() * total, side='right')
+        if index >= n:  # Guard against floating-point edge at the upper bound
+            index = n - 1
+
+        winners[count] = index
+        count += 1
+        wins[index] += 1
+        caps[index] -= 1
+        if caps[index] > 0:
+            weights[index] = (1.0 / (1.0 + np.log(1.0 + wins[index]))) * \
+                             (1.5 if wins[index] < average_winnings else 1.0)
+        else:
+            weights[index] = 0.0
+    return winners[:count]
+
+
+def _run_lottery(winnings_key, items, participant_caps, winnings_tracker, allocation,
+                 participant_item_count=None):
+    """Run the weighted lottery for one item pool and append the results.
+
+    items must be in pop() order (highest-numbered first). participant_caps
+    maps member -> how many items they may still win from this pool; members
+    with a zero cap are skipped. Winners update the tracker under
+    winnings_key, and any unallocated items fall back to first come, first
+    serve.
+    """
+    members = [p for p, cap in participant_caps.items() if cap > 0]
+    if items and members:
+        # Compute average winnings for dynamic boosting
+        totals = [w for (c, _), w in winnings_tracker.items() if c == winnings_key]
+        average_winnings = sum(totals) / len(totals) if totals else 0
+
+        wins = np.array([winnings_tracker.get((winnings_key, p), 0) for p in members],
+                        dtype=np.float64)
+        caps = np.array([participant_caps[p] for p in members], dtype=np.int64)
+        for index in _select_winners(wins, caps, average_winnings, len(items), rng):
+            winner = members[index]
+            allocation.append((items.pop(), winner))
+            winnings_tracker[(winnings_key, winner)] += 1
+            if participant_item_count is not None:
+                participant_item_count[winner] += 1
+
+    # If there are still unallocated items, mark them as "First Come, First Serve"
+    allocation.extend([(item, "First Come, First Serve") for item in reversed(items)])
+
+
+def distribute_items(participants_choices, winnings_tracker):
+    """Distribute items fairly among participants using improved weighted random selection."""
+    allocation = []  # Store allocation results
+    participant_item_count = defaultdict(int)  # Track how many items each participant has won
+
+    try:
+        for category, limit in CATEGORY_LIMITS.items():
+            if isinstance(limit, int):  # Fixed-limit categories (e.g., Insignias)
+                requested = {
+                    p: participants_choices[p][category]  # Requested number of items (1 or 2)
+                    for p in participants_choices if category in participants_choices[p]
+                }
+
+                # Items are generated highest-numbered first so pop() hands them out in order
+                items = [f"{category} #{i}" for i in range(limit, 0, -1)]
+
+                # First pass: Distribute one item per participant who requested at least one
+                for participant in [p for p, max_items in requested.items() if max_items >= 1]:
+                    if items:
+                        item = items.pop()
+                        allocation.append((item, participant))
+                        winnings_tracker[(category, participant)] += 1
+                        participant_item_count[participant] += 1
+
+                # Second pass: remaining items go to those who asked for two
+                second_pass_caps = {
+                    p: 2 - participant_item_count[p]
+                    for p, max_items in requested.items() if max_items == 2
+                }
+                _run_lottery(category, items, second_pass_caps, winnings_tracker,
+                             allocation, participant_item_count)
+
+            elif isinstance(limit, dict):  # Subcategories (e.g., Stones, Selection cards)
+                for subcategory, sub_limit in limit.items():
+                    caps = {
+                        p: min(2, participants_choices[p][category + '_count'].get(subcategory, 0))
+                        for p in participants_choices if category in participants_choices[p]
+                    }
+
+                    # Items are generated highest-numbered first so pop() hands them out in order
+                    items = [f"{subcategory} #{i}" for i in range(sub_limit, 0, -1)]
+
+                    _run_lottery(subcategory, items, caps, winnings_tracker, allocation)
+
+        return allocation
+    except Exception as e:
+        print("Error during item distribution:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def update_winnings_log(allocation):
+    """Append this run's winners to the winnings log as delta rows.
+
+    Only the (category, member, delta) rows of the current run are
+    written, instead of rewriting the full cumulative table. Once the
+    log grows past the compaction threshold it is collapsed back into
+    a single part file.
+    """
+    try:
+        deltas = Counter(
+            (item.rsplit(' #', 1)[0], winner)
+            for item, winner in allocation
+            if winner != "First Come, First Serve"
+        )
+        if not deltas:
+            return
+
+        _append_log_part([category for category, _ in deltas],
+                         [member for _, member in deltas],
+                         list(deltas.values()))
+
+        # Periodic compaction: fold all parts into one aggregated part
+        parts = os.listdir(winnings_log_dir)
+        if len(parts) >= compaction_threshold:
+            table = _read_log()
+            totals = defaultdict(int)
+            for category, member, delta in zip(table.column('category').to_pylist(),
+                                               table.column('member').to_pylist(),
+                                               table.column('delta').to_pylist()):
+                totals[(category, member)] += int(delta)
+            for part in parts:
+                os.remove(os.path.join(winnings_log_dir, part))
+            _append_log_part([category for category, _ in totals],
+                             [member for _, member in totals],
+                             list(totals.values()))
+    except Exception as e:
+        print("Error updating winnings log:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+
+
+def write_output(allocation):
+    """Write the allocation result to a CSV file in the desired format."""
+    try:
+        # Write the two-column CSV directly; a large write buffer keeps it one flush
+        with open("weekly_allocation.csv", "w", newline="", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(("Item", "Winner"))
+            writer.writerows(allocation)
+        print("\nAllocation results written to 'weekly_allocation.csv'")
+    except Exception as e:
+        print("Error writing output file:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+def main():
+    try:
+        # Load cumulative winnings from previous weeks
+        winnings_tracker = load_previous_winnings()
+        
+        # Fetch and parse participants data from Google Sheet
+        data = fetch_google_sheet_data(sheet_url)
+        participants = parse_participants(data)
+        
+        # Distribute items fairly and get the allocation result
+        allocation = distribute_items(participants, winnings_tracker)
+        
+        # Append this run's winnings to the log
+        update_winnings_log(allocation)
+        
+        # Write the allocation result to a CSV file
+        write_output(allocation)
+    except Exception as e:
+        print("Error in main function:", e)
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()